@@ -1,13 +1,27 @@
 # Imports
 import os
-import requests
+import re
+import csv
+import time
+import asyncio
+import hashlib
+import logging
+import functools
+import contextlib
+import tempfile
+import httpx
+import orjson
+import redis
+from redis import asyncio as aioredis
+from aiolimiter import AsyncLimiter
+from urllib.parse import urlsplit
+from typing import List, Optional
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Langchain
-from langchain.pydantic_v1 import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from langchain.tools import StructuredTool
-from llm import LLM
 
 # Phidata
 from phi.assistant.python import PythonAssistant
@@ -16,24 +30,262 @@ from phi.llm.openai import OpenAIChat
 # Contracts
 from ape import Contract, networks
 from ape.exceptions import ContractLogicError
-from ape.types import AddressType
-from langchain.pydantic_v1 import BaseModel, Field
 
 
 # Loading the environmental variables from the containing folder
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Seconds to wait on Redis before giving up on the cache and going straight to the API
+REDIS_TIMEOUT = 0.5
+
+# Response cache, created per event loop by get_redis_client. The Redis server is expected to run with `maxmemory-policy allkeys-lfu`
+_redis_client = None
+_redis_client_loop = None
+
+def get_redis_client() -> aioredis.Redis:
+    """
+    Returns the Redis client for the running event loop, creating it on first use.
+
+    Its connections are bound to the loop they were opened on, so a new client is created when a later asyncio.run starts a new loop.
+    """
+    global _redis_client, _redis_client_loop
+    loop = asyncio.get_running_loop()
+    if _redis_client is None or _redis_client_loop is not loop:
+        _redis_client = aioredis.Redis(
+            host=os.getenv("REDIS_HOST", "localhost"),
+            port=int(os.getenv("REDIS_PORT", 6379)),
+            socket_connect_timeout=REDIS_TIMEOUT,
+            socket_timeout=REDIS_TIMEOUT
+        )
+        _redis_client_loop = loop
+    return _redis_client
+
+# How long (in seconds) each endpoint's response can be served from the cache.
+# URLs that match none of these are never cached.
+CACHE_TTLS = (
+    ("/coins/list", 3600),
+    ("/market_chart", 300),
+    ("/ohlc", 300),
+    ("/nfts/", 600),
+    ("/search/trending", 60),
+    ("/derivatives/exchanges", 300),
+    ("/cryptocurrency/listings/latest", 60),
+    ("/cryptocurrency/quotes/latest", 60),
+    ("api.fxratesapi.com/latest", 3600),
+)
+
+# Seconds past its TTL that a cached response is still served while it's refreshed in the background
+STALE_TTL = 300
+# Seconds past that during which an expired response is kept as a fallback for when the API is down
+FALLBACK_TTL = 86400
+
 """
 FUNCTIONS
 """
 
-def fetch_data(url, headers):
+# Connection pooling and retry policy for the shared HTTP client
+MAX_CONNECTIONS = 40
+MAX_KEEPALIVE_CONNECTIONS = 20
+REQUEST_TIMEOUT = 10.0
+BASE_HEADERS = {"accept": "application/json"}
+
+# API key headers, read from the environment once rather than on every request.
+# A key that isn't set is left out, since httpx rejects None header values
+COINGECKO_API_KEY = os.getenv("COINGECKO_API_KEY")
+COIN_MARKET_CAP_TOKEN = os.getenv("COIN_MARKET_CAP_TOKEN")
+COINGECKO_HEADERS = {"x-cg-demo-api-key": COINGECKO_API_KEY} if COINGECKO_API_KEY else {}
+COIN_MARKET_CAP_HEADERS = {"X-CMC_PRO_API_KEY": COIN_MARKET_CAP_TOKEN} if COIN_MARKET_CAP_TOKEN else {}
+
+# Chainstack RPC endpoint for Avalanche mainnet. The URL embeds the access key, so it comes from the environment too
+AVALANCHE_RPC_URL = os.getenv("AVALANCHE_RPC_URL")
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Seconds to wait after a 429 that doesn't say how long to back off for
+DEFAULT_RETRY_AFTER = 60
+# Longest Retry-After that is waited out. Longer ones are returned to the caller, since the coin index locks are held while waiting
+MAX_RETRY_AFTER = 90
+
+# Client-side request budgets per API host, so bursts of tool calls don't get 429'd.
+# CoinGecko's demo key and CoinMarketCap's basic plan both allow 30 requests per minute
+RATE_LIMITERS = {
+    "api.coingecko.com": AsyncLimiter(max_rate=25, time_period=60),
+    "pro-api.coinmarketcap.com": AsyncLimiter(max_rate=25, time_period=60),
+    "api.fxratesapi.com": AsyncLimiter(max_rate=50, time_period=60),
+}
+
+# Shared HTTP client and the event loop its connections are bound to
+_client = None
+_client_loop = None
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the shared HTTP/2 client for the running event loop, creating it on first use.
+
+    Concurrent requests to the same API are multiplexed over one kept-alive connection, so they skip the TCP and TLS handshakes.
+    A client left over from an earlier asyncio.run is replaced, since its connections belong to a closed loop.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client_loop = loop
+        _client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS, max_connections=MAX_CONNECTIONS),
+            timeout=REQUEST_TIMEOUT,
+            headers=BASE_HEADERS
+        )
+    return _client
+
+# Locks guarding the in-memory caches below. An asyncio.Lock binds to the first loop that contends on it, so they are created per event loop
+_locks = {}
+_locks_loop = None
+
+def get_lock(name: str) -> asyncio.Lock:
+    """
+    Returns the lock with the given name for the running event loop, creating it on first use.
+    """
+    global _locks, _locks_loop
+    loop = asyncio.get_running_loop()
+    if _locks_loop is not loop:
+        _locks = {}
+        _locks_loop = loop
+    if name not in _locks:
+        _locks[name] = asyncio.Lock()
+    return _locks[name]
+
+def get_cache_ttl(url: str):
+    """
+    Returns the cache TTL in seconds for the given URL, or None if its responses should not be cached.
+    """
+    for endpoint, ttl in CACHE_TTLS:
+        if endpoint in url:
+            return ttl
+    return None
+
+def is_error_response(data) -> bool:
+    """
+    Returns True if `data` is the error dict fetch_data returns for a failed request.
+    """
+    return isinstance(data, dict) and "error" in data
+
+def redis_cache(func):
+    """
+    Caches the JSON responses of an async `func(url, headers)` in Redis, keyed by URL, using the TTL from CACHE_TTLS.
+
+    Responses are served fresh until their TTL, then served stale for STALE_TTL while a background task refreshes them.
+    After that the request blocks on the API, and if it fails the last good response is returned marked with
+    "x_cache": "stale". Error responses are never cached, and the request goes straight to the API if Redis is unreachable.
+    """
+    # Keys being refreshed in the background, and the tasks doing it so they aren't garbage collected mid-flight
+    refreshing = set()
+    refresh_tasks = set()
+
+    async def refresh(key, ttl, url, headers):
+        data = await func(url, headers)
+        if not is_error_response(data):
+            now = time.time()
+            entry = {"fresh_until": now + ttl, "stale_until": now + ttl + STALE_TTL, "body": data}
+            try:
+                await get_redis_client().setex(key, ttl + STALE_TTL + FALLBACK_TTL, orjson.dumps(entry))
+            except redis.RedisError as e:
+                logger.warning("Redis cache write failed: %s", e)
+        return data
+
+    def refresh_in_background(key, ttl, url, headers):
+        if key in refreshing:
+            return
+        refreshing.add(key)
+        task = asyncio.create_task(refresh(key, ttl, url, headers))
+        refresh_tasks.add(task)
+        task.add_done_callback(refresh_tasks.discard)
+        task.add_done_callback(lambda _: refreshing.discard(key))
+
+    @functools.wraps(func)
+    async def wrapper(url, headers=None):
+        ttl = get_cache_ttl(url)
+        if ttl is None:
+            return await func(url, headers)
+
+        key = "http:" + hashlib.blake2b(url.encode()).hexdigest()
+        entry = None
+        try:
+            cached = await get_redis_client().get(key)
+            if cached is not None:
+                entry = orjson.loads(cached)
+                if not isinstance(entry, dict) or "fresh_until" not in entry:
+                    # Written before responses were stored with their freshness window
+                    entry = None
+        except redis.RedisError as e:
+            logger.warning("Redis cache read failed: %s", e)
+
+        now = time.time()
+        if entry is not None and now < entry["fresh_until"]:
+            return entry["body"]
+        if entry is not None and now < entry["stale_until"]:
+            refresh_in_background(key, ttl, url, headers)
+            return entry["body"]
+
+        data = await refresh(key, ttl, url, headers)
+        if is_error_response(data) and entry is not None:
+            # The API is failing, so fall back to the last good response
+            logger.warning("Serving stale response for %s: %s", url, data["error"])
+            body = entry["body"]
+            return {**body, "x_cache": "stale"} if isinstance(body, dict) else body
+        return data
+
+    return wrapper
+
+def get_retry_after(headers) -> int:
+    """
+    Returns the number of seconds a rate-limited response asks the client to wait, falling back to DEFAULT_RETRY_AFTER.
+    """
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()  # Raises an HTTPError for bad responses
-        return response.json()
-    except requests.RequestException as e:
-        return {"error": str(e)}
+        return int(headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+    except ValueError:
+        # Retry-After can also be an HTTP date, which isn't worth parsing for a single retry
+        return DEFAULT_RETRY_AFTER
+
+@redis_cache
+async def fetch_data(url, headers=None):
+    # Requests served from the cache never reach this point, so only cache misses spend rate limit tokens
+    host = urlsplit(url).hostname
+    limiter = RATE_LIMITERS.get(host) or contextlib.nullcontext()
+    rate_limited = False
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with limiter:
+                response = await get_client().get(url, headers=headers)
+
+            if response.status_code == 429:
+                retry_after = get_retry_after(response.headers)
+                logger.warning(
+                    "Rate limited by %s, retrying after %ss", host, retry_after,
+                    extra={"host": host, "status": 429, "retry_after": retry_after, "attempt": attempt}
+                )
+                if rate_limited or attempt == MAX_RETRIES or retry_after > MAX_RETRY_AFTER:
+                    # Tell the caller how long to wait instead of retrying again straight away
+                    return {"error": f"Rate limited by {host}", "retry_after": retry_after}
+                rate_limited = True
+                delay = retry_after
+            elif response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                response.raise_for_status()  # Raises an HTTPStatusError for bad responses
+                return orjson.loads(response.content)
+            else:
+                # Back off exponentially before retrying a failed request
+                delay = BACKOFF_FACTOR * 2 ** attempt
+        except httpx.TransportError as e:
+            # Connection failures and timeouts are retried with the same backoff as failed responses
+            if attempt == MAX_RETRIES:
+                return {"error": str(e) or type(e).__name__}
+            delay = BACKOFF_FACTOR * 2 ** attempt
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            return {"error": str(e)}
+
+        await asyncio.sleep(delay)
 
 def get_all_coins():
     """
@@ -42,81 +294,270 @@ def get_all_coins():
     
     return "Due to not being able to process the sheer number of coins I am unable to process this request. Please ask for a specific coin and I will find it."
 
-def get_specific_coin_data(coin_data: str):
+# CoinGecko coin list reduced to a lookup of lowercased id, name and symbol -> coin id,
+# plus the candidate ids of names and symbols that couldn't be narrowed down to one coin
+_coin_id_index = {"ts": 0, "data": None}
+
+async def _get_coin_id_index(ttl: int = 3600):
+    """
+    Returns the coin id lookups built from the full CoinGecko /coins/list response: 'ids' maps lowercased coin ids, names and
+    symbols to coin ids, and 'candidates' maps each name or symbol still shared by several coins to their ids.
+
+    When several coins share a name or symbol, the one whose id is its own name (e.g. ethereum for ETH, over its bridged copies) wins.
+    The index is rebuilt only when the cached copy is older than `ttl` seconds. If the coin list can't be fetched, the error response is returned.
+    """
+    async with get_lock("coin_id_index"):
+        if _coin_id_index["data"] is not None and time.time() - _coin_id_index["ts"] < ttl:
+            return _coin_id_index["data"]
+
+        url = "https://api.coingecko.com/api/v3/coins/list"
+        coins = await fetch_data(url, COINGECKO_HEADERS)
+        if not isinstance(coins, list):
+            # Don't cache failed requests, and hand the error back so a rate limit reaches the caller
+            return coins if is_error_response(coins) else {"error": "Unexpected response from the CoinGecko coin list."}
+
+        ids = {coin["id"]: coin["id"] for coin in coins}
+        candidates = {}
+        canonical_ids = {coin["id"] for coin in coins if coin["id"] == coin["name"].strip().lower().replace(" ", "-")}
+        for field in ("name", "symbol"):
+            ids_by_key = {}
+            for coin in coins:
+                ids_by_key.setdefault(coin[field].lower(), set()).add(coin["id"])
+            for key, key_ids in ids_by_key.items():
+                if key in ids:
+                    continue
+                matches = key_ids if len(key_ids) == 1 else key_ids & canonical_ids
+                if len(matches) == 1:
+                    ids[key] = next(iter(matches))
+                else:
+                    candidates[key] = key_ids
+
+        index = {"ids": ids, "candidates": candidates}
+        _coin_id_index["ts"] = time.time()
+        _coin_id_index["data"] = index
+        return index
+
+async def resolve_coin_id(coin_name: str):
+    """
+    Translates a coin name, symbol or id into its CoinGecko id without an extra API request per lookup.
+
+    A name or symbol shared by several coins with no canonical one, such as USDC, is settled by the CoinMarketCap ranking.
+    Returns the lowercased input unchanged if it can't be resolved, or the rate limit error if CoinGecko is rate limiting us,
+    so callers don't send it another request straight away.
+    """
+    query = coin_name.strip().lower()
+    index = await _get_coin_id_index()
+    if is_error_response(index):
+        return index if "retry_after" in index else query
+    if query in index["ids"]:
+        return index["ids"][query]
+
+    candidates = index["candidates"].get(query)
+    if candidates:
+        # CoinMarketCap slugs mostly match CoinGecko ids, e.g. usd-coin, and its listing is ranked
+        cmc_index = await _get_cmc_index()
+        if not is_error_response(cmc_index):
+            coin = _lookup_coin(cmc_index, query)
+            if coin is not None and coin["slug"] in candidates:
+                return coin["slug"]
+    return query
+
+# Lookup tables over the CoinMarketCap listing, rebuilt whenever the listing is refetched
+_cmc_index = {"ts": 0, "data": None}
+
+async def _get_cmc_index(ttl: int = 60):
+    """
+    Returns dicts mapping each lowercased coin name, symbol and slug in the CoinMarketCap top 1000 listing to its coin data,
+    plus a dict mapping each coin's CoinMarketCap id to its USD price.
+
+    The index is rebuilt only when the cached copy is older than `ttl` seconds. If the listing can't be fetched, the error response is returned.
+    """
+    async with get_lock("cmc_index"):
+        if _cmc_index["data"] is not None and time.time() - _cmc_index["ts"] < ttl:
+            return _cmc_index["data"]
+
+        url = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/listings/latest?limit=1000"
+        # The whole listing is decoded in one go rather than streamed, since every record goes into the index
+        # and the decoded response is what the response cache stores
+        response = await fetch_data(url, COIN_MARKET_CAP_HEADERS)
+        if is_error_response(response):
+            # Don't cache failed requests, and hand the error back so a rate limit reaches the caller
+            return response
+
+        index = {"name": {}, "symbol": {}, "slug": {}, "usd_price": {}}
+        for coin in response.get("data", []):
+            for field in ("name", "symbol", "slug"):
+                # Listings are ranked, so the highest ranked coin wins on duplicate symbols
+                index[field].setdefault(coin[field].lower(), coin)
+            # Parse the USD quote once per refresh rather than once per price lookup
+            index["usd_price"][coin["id"]] = coin.get('quote', {}).get('USD', {}).get('price')
+
+        _cmc_index["ts"] = time.time()
+        _cmc_index["data"] = index
+        return index
+
+def _lookup_coin(index: dict, coin_data: str):
+    """
+    Returns the coin in the CoinMarketCap index matching the given name, symbol or slug, or None if there is no match.
+    """
+    query = coin_data.lower()
+    return index["name"].get(query) or index["symbol"].get(query) or index["slug"].get(query)
+
+async def get_specific_coin_data(coin_data: str):
     """
     Returns specific cryptocurrency coin data from the coin gecko platform based on the provided coin name, symbol, or id.
     """
-    url = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/listings/latest?limit=1000"
-    headers = {
-        "accept": "application/json",
-        "X-CMC_PRO_API_KEY": os.getenv("COIN_MARKET_CAP_TOKEN")
-    }
-    coins = fetch_data(url, headers).get("data", [])
+    index = await _get_cmc_index()
+    if is_error_response(index):
+        return index
+    coin = _lookup_coin(index, coin_data)
 
-    for coin in coins:
-        if coin_data.lower() in [coin["name"].lower(), coin["symbol"].lower(), coin["slug"].lower()]:
-            return coin
+    if coin is not None:
+        return coin
 
     return f"No data found for the provided coin: {coin_data}"
 
 
-def get_specific_coin_address(coin_name: str):
+async def get_specific_coin_address(coin_name: str):
     """
     Returns the contract address for a specific cryptocurrency coin.
     """
-    url = f"https://api.coingecko.com/api/v3/coins/{coin_name}"
-    headers = {
-        "accept": "application/json",
-        "x-cg-demo-api-key": os.getenv("COINGECKO_API_KEY")
-    }
-    response = fetch_data(url, headers)
+    coin_id = await resolve_coin_id(coin_name)
+    if is_error_response(coin_id):
+        return coin_id
+    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}"
+    response = await fetch_data(url, COINGECKO_HEADERS)
     
+    if is_error_response(response):
+        return response
     if response:
         return response.get("platforms")
     else:
         return f"No data found for the provided coin: {coin_name}"
 
-def get_specific_coin_price(coin_name: str):
+async def get_specific_coin_price(coin_name: str):
     """
     Returns the USD price of a specific cryptocurrency coin from the CoinGecko platform based on the provided coin name, symbol, or id.
     """
-    coin_data = get_specific_coin_data(coin_name)
-    
-    if isinstance(coin_data, str):
-        # If the returned value is an error message, return it
-        return coin_data
-    
-    # Extract the USD price from the coin data
-    usd_price = coin_data.get('quote', {}).get('USD', {}).get('price')
+    index = await _get_cmc_index()
+    if is_error_response(index):
+        return index
+    coin = _lookup_coin(index, coin_name)
+
+    if coin is None:
+        return f"No data found for the provided coin: {coin_name}"
+
+    # The USD price is extracted from the coin data when the index is built
+    usd_price = index["usd_price"].get(coin["id"])
 
     if usd_price is not None:
         return usd_price
     else:
         return f"USD price not found for the provided coin: {coin_name}"
 
-def convert_coin_price(usd_coin_price: str, currency_to_convert_to: str):
+async def get_specific_coin_prices(coin_names: List[str]):
+    """
+    Returns the USD prices of several cryptocurrency coins at once, keyed by the name, symbol, or id each coin was asked for.
+
+    Coins in the CoinMarketCap top 1000 listing are priced from the cached index, and the rest are fetched together in a single quotes request by symbol.
+    Coins without a price are mapped to a message saying why, including the error if the quotes request failed.
+    """
+    index = await _get_cmc_index()
+    if is_error_response(index):
+        return index
+    prices = {}
+    symbols = {}
+
+    for coin_name in coin_names:
+        coin = _lookup_coin(index, coin_name)
+        if coin is not None:
+            prices[coin_name] = index["usd_price"].get(coin["id"])
+        else:
+            symbols[coin_name.strip().upper()] = coin_name
+
+    if symbols:
+        url = f"https://pro-api.coinmarketcap.com/v2/cryptocurrency/quotes/latest?symbol={','.join(symbols)}"
+        response = await fetch_data(url, COIN_MARKET_CAP_HEADERS)
+
+        if is_error_response(response):
+            for coin_name in symbols.values():
+                prices[coin_name] = f"Error fetching the price of {coin_name}: {response['error']}"
+        else:
+            for symbol, matches in response.get("data", {}).items():
+                if not matches:
+                    continue
+                # Every coin sharing the symbol is returned, so take the highest ranked one
+                coin = min(matches, key=lambda match: match.get("cmc_rank") or float("inf"))
+                prices[symbols.get(symbol, symbol)] = coin.get('quote', {}).get('USD', {}).get('price')
+
+    results = {}
+    for coin_name in coin_names:
+        if coin_name not in prices:
+            results[coin_name] = f"No data found for the provided coin: {coin_name}"
+        elif prices[coin_name] is None:
+            results[coin_name] = f"USD price not found for the provided coin: {coin_name}"
+        else:
+            results[coin_name] = prices[coin_name]
+    return results
+
+# Exchange rates keyed on (currency, date), so each rate is fetched at most once a day per process
+FX_RATE_CACHE_SIZE = 256
+_fx_rates = {}
+
+async def _get_fx_rate(currency: str, date: str):
+    """
+    Returns the exchange rate from USD to the given currency on the given date (YYYY-MM-DD), or None if the rate could not be found.
+    """
+    key = (currency.upper(), date)
+    if key in _fx_rates:
+        return _fx_rates[key]
+
+    url = f"https://api.fxratesapi.com/latest?base=USD&currencies={currency}&format=json"
+    data = await fetch_data(url)
+    rate = data.get('rates', {}).get(currency.upper())
+
+    if rate is not None:
+        if len(_fx_rates) >= FX_RATE_CACHE_SIZE:
+            _fx_rates.clear()
+        _fx_rates[key] = rate
+    return rate
+
+async def convert_coin_price(currency_to_convert_to: str, usd_coin_price: str = None, coin_name: str = None):
     """
     Converts the given USD coin price to the specified currency using a conversion API.
+
+    The USD exchange rate is cached, so converting several prices to the same currency only calls the API once.
+    If a coin name is given instead of a price, the coin's USD price and the exchange rate are fetched concurrently.
     """
     # Get today's date in the format YYYY-MM-DD
     today_date = datetime.today().strftime('%Y-%m-%d')
-    
-    # Construct the URL for the API request
-    url = f"https://api.fxratesapi.com/convert?from=USD&to={currency_to_convert_to}&date={today_date}&amount={usd_coin_price}&format=json"
-    
-    # Send a GET request to the conversion API
-    response = requests.get(url)
-    data = response.json()
 
-    # Extract the converted amount from the response
-    converted_amount = data.get('result')
+    if coin_name:
+        usd_price, rate = await asyncio.gather(
+            get_specific_coin_price(coin_name),
+            _get_fx_rate(currency_to_convert_to, today_date)
+        )
 
-    if converted_amount is not None:
-        return converted_amount
+        if isinstance(usd_price, str) or is_error_response(usd_price):
+            # If the returned value is an error message, return it
+            return usd_price
+        if rate is None:
+            return f"Exchange rate not found for the provided currency: {currency_to_convert_to}"
+        return usd_price * rate
+
+    try:
+        usd_price = float(str(usd_coin_price).replace('$', '').replace(',', ''))
+    except ValueError:
+        return f"Invalid USD price provided: {usd_coin_price}"
+
+    rate = await _get_fx_rate(currency_to_convert_to, today_date)
+
+    if rate is not None:
+        return usd_price * rate
     else:
         return f"Conversion result not found for the provided data: {usd_coin_price} to {currency_to_convert_to}"
 
-def get_nft_data(nft_data: str):
+async def get_nft_data(nft_data: str):
     """
     Retrieves NFT data from the CoinGecko API based on the provided NFT data.
 
@@ -128,93 +569,111 @@ def get_nft_data(nft_data: str):
         otherwise a string indicating that no data was found for the provided NFT.
     """
     url = f"https://api.coingecko.com/api/v3/nfts/{nft_data.replace(' ', '-').lower()}"
-    headers = {
-        "accept": "application/json",
-        "x-cg-demo-api-key": os.getenv("COINGECKO_API_KEY")
-    }
-    response = fetch_data(url, headers)
+    response = await fetch_data(url, COINGECKO_HEADERS)
     
     if response:
         return response
     else:
         return f"No data found for the provided NFT: {nft_data}"
 
-def get_derivative_data(derivative_data: str):
+async def get_derivative_data(derivative_data: str):
     """
     Returns a specific derivative and its respective data from the CoinGecko platform based on the provided information.
     """
 
     url = "https://api.coingecko.com/api/v3/derivatives/exchanges?order=name_asc&per_page=100"
-    headers = {
-        "accept": "application/json",
-        "x-cg-demo-api-key": os.getenv("COINGECKO_API_KEY")
-    }
-    response = fetch_data(url, headers)
+    response = await fetch_data(url, COINGECKO_HEADERS)
+    if is_error_response(response):
+        return response
     
-    if response:
-        exchanges = response
-        for exchange in exchanges:
-            if derivative_data.lower() in [exchange["name"].lower(), exchange["id"].lower()]:
+    if response and isinstance(response, list):
+        query = derivative_data.lower()
+        for exchange in response:
+            if query == exchange["id"] or query == exchange["name"].lower():
                 return exchange
         return f"No data found for the provided derivative exchange: {derivative_data}"
     else:
         return f"Failed to fetch data from the API."
 
-def get_trending_coins():
+# Cached /search/trending response shared by the three trending tools
+_trending_cache = {"ts": 0, "data": None}
+
+async def _get_trending(ttl: int = 60):
+    """
+    Returns the CoinGecko trending response, refetching it only when the cached copy is older than `ttl` seconds.
+
+    The 'price_change_percentage_24h' field is stripped from each coin once, when the cache is filled.
+    """
+    async with get_lock("trending"):
+        if _trending_cache["data"] is not None and time.time() - _trending_cache["ts"] < ttl:
+            return _trending_cache["data"]
+
+        url = "https://api.coingecko.com/api/v3/search/trending"
+        data = await fetch_data(url, COINGECKO_HEADERS)
+        if is_error_response(data):
+            # Don't cache failed requests
+            return data
+
+        for coin in data.get('coins', []):
+            # Remove 'price_change_percentage_24h' from the coin data
+            if 'price_change_percentage_24h' in coin.get('item', {}).get('data', {}):
+                del coin['item']['data']['price_change_percentage_24h']
+
+        _trending_cache["ts"] = time.time()
+        _trending_cache["data"] = data
+        return data
+
+async def get_trending_coins():
     """
     Fetches and processes trending coins data from the CoinGecko API, removing 'price_change_percentage_24h' from each coin's data.
 
     Returns:
         list: A list of dictionaries, each representing a trending coin with its data, excluding 'price_change_percentage_24h'.
     """
-    url = "https://api.coingecko.com/api/v3/search/trending"
-    headers = {
-        "accept": "application/json",
-        "x-cg-demo-api-key": os.getenv("COINGECKO_API_KEY")
-    }
-    data = fetch_data(url, headers)
-    coins_data = data.get('coins', [])
+    data = await _get_trending()
+    if is_error_response(data):
+        return data
+    return data.get('coins', [])
 
-    for coin in coins_data:
-        # Remove 'price_change_percentage_24h' from the coin data
-        if 'price_change_percentage_24h' in coin.get('item', {}).get('data', {}):
-            del coin['item']['data']['price_change_percentage_24h']
-
-    return coins_data
-
-def get_trending_nfts():
+async def get_trending_nfts():
     """
     Fetches and returns trending NFTs data from the CoinGecko API.
 
-    This function sends a GET request to the CoinGecko API to retrieve trending NFTs data. It sets the 'accept' header to 'application/json' to specify the expected response format and includes the API key in the 'x-cg-demo-api-key' header for authentication. The function then parses the response and returns a list of trending NFTs data. If no NFTs data is found, an empty list is returned.
+    The trending response is shared with the other trending tools, so this only hits the API when the cached copy has expired. If no NFTs data is found, an empty list is returned.
 
     Returns:
         list: A list of dictionaries, each representing a trending NFT with its data.
     """
-    url = "https://api.coingecko.com/api/v3/search/trending"
-    headers = {
-        "accept": "application/json",
-        "x-cg-demo-api-key": os.getenv("COINGECKO_API_KEY")
-    }
-    data = fetch_data(url, headers)
+    data = await _get_trending()
+    if is_error_response(data):
+        return data
     return data.get('nfts', [])
 
-def get_trending_categories():
+async def get_trending_categories():
     """
     Fetches and returns trending categories data from the CoinGecko API.
 
     Returns:
         list: A list of dictionaries, each representing a trending category with its data.
     """
-    url = "https://api.coingecko.com/api/v3/search/trending"
-    headers = {
-        "accept": "application/json",
-        "x-cg-demo-api-key": os.getenv("COINGECKO_API_KEY")
-    }
-    data = fetch_data(url, headers)
+    data = await _get_trending()
+    if is_error_response(data):
+        return data
     return data.get('categories', [])
 
-def get_historical_chart_data_by_id(coin_name: str, days: int, chart_data_type: str):
+async def _get_market_chart(coin_name: str, days: int):
+    """
+    Fetches the full CoinGecko market chart (prices, market caps and total volumes) of a coin.
+
+    Every chart data type comes from this one response, which is cached by (coin_name, days) through the response cache.
+    """
+    coin_id = await resolve_coin_id(coin_name)
+    if is_error_response(coin_id):
+        return coin_id
+    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart?vs_currency=usd&days={days}&interval=daily&precision=full"
+    return await fetch_data(url, COINGECKO_HEADERS)
+
+async def get_historical_chart_data_by_id(coin_name: str, days: int, chart_data_type: str):
     """
     Gets the historical chart data of a coin including time in UNIX, price, market cap and 24hrs volume based on particular coin id from the CoinGecko API.
 
@@ -225,12 +684,9 @@ def get_historical_chart_data_by_id(coin_name: str, days: int, chart_data_type:
     Returns:
         dict: A dictionary containing the historical data for the specified coin over the specified number of days. If no data is found, an empty dictionary is returned.
     """
-    url = f"https://api.coingecko.com/api/v3/coins/{coin_name}/market_chart?vs_currency=usd&days={days}&interval=daily&precision=full"
-    headers = {
-        "accept": "application/json",
-        "x-cg-demo-api-key": os.getenv("COINGECKO_API_KEY")
-    }
-    response_data = fetch_data(url, headers)
+    response_data = await _get_market_chart(coin_name, days)
+    if is_error_response(response_data):
+        return response_data
     
     # Extract the requested data
     if chart_data_type in response_data:
@@ -238,32 +694,103 @@ def get_historical_chart_data_by_id(coin_name: str, days: int, chart_data_type:
     else:
         return {"error": f"Data type '{chart_data_type}' not found in the response."}
 
-def get_historical_chart_data_by_id_timerange(coin_name: str, from_: int, to_: str):
-    url = f"https://api.coingecko.com/api/v3/coins/{coin_name}/market_chart/range?vs_currency=usd&from={from_}&to={to_}&precision=full"
+async def get_historical_chart_data_by_id_timerange(coin_name: str, from_: int, to_: str):
+    coin_id = await resolve_coin_id(coin_name)
+    if is_error_response(coin_id):
+        return coin_id
+    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart/range?vs_currency=usd&from={from_}&to={to_}&precision=full"
 
 
-    headers = {
-        "accept": "application/json",
-        "x-cg-demo-api-key": os.getenv("COINGECKO_API_KEY")
-    }
-    data = fetch_data(url, headers)
+    data = await fetch_data(url, COINGECKO_HEADERS)
     return data
 
-def get_ohlc_chat_by_id(coin_name: str, days: int):
-    url = f"https://api.coingecko.com/api/v3/coins/{coin_name}/ohlc?vs_currency=usd&days={days}&precision=full"
+async def get_ohlc_chat_by_id(coin_name: str, days: int):
+    coin_id = await resolve_coin_id(coin_name)
+    if is_error_response(coin_id):
+        return coin_id
+    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/ohlc?vs_currency=usd&days={days}&precision=full"
     
-    headers = {
-        "accept": "application/json",
-        "x-cg-demo-api-key": os.getenv("COINGECKO_API_KEY")
-    }
     
-    data = fetch_data(url, headers)
+    data = await fetch_data(url, COINGECKO_HEADERS)
     
     return data
 
-def find_arb_opportunities_traderjoe(coin1, coin2):
-    from ape import networks
+async def get_historical_multi(coin_name: str, days: int, chart_data_types: List[str]):
+    """
+    Gets several historical chart data series of a coin from a single CoinGecko market chart request.
+
+    Args:
+        coin_name (str): The ID of the cryptocurrency coin for which to fetch historical data.
+        days (int): The number of days for which to fetch historical data.
+        chart_data_types (list): The series to return, any of prices, market_caps and total_volumes.
+
+    Returns:
+        dict: A dictionary mapping each requested series to its data, or an error if none of them were found.
+    """
+    response_data = await _get_market_chart(coin_name, days)
+    if is_error_response(response_data):
+        return response_data
+
+    series = {data_type: response_data[data_type] for data_type in chart_data_types if data_type in response_data}
+
+    if series:
+        return series
+    else:
+        return {"error": f"None of the data types {chart_data_types} were found in the response."}
 
+async def get_historical_and_ohlc_data(coin_name: str, days: int):
+    """
+    Gets the historical market chart and the OHLC data of a coin, fetching both from the CoinGecko API concurrently.
+
+    Returns:
+        dict: A dictionary with the market chart under 'market_chart' and the OHLC data under 'ohlc'.
+    """
+    market_chart, ohlc = await asyncio.gather(
+        _get_market_chart(coin_name, days),
+        get_ohlc_chat_by_id(coin_name, days)
+    )
+    return {"market_chart": market_chart, "ohlc": ohlc}
+
+# Directory the market chart CSVs handed to the Python assistant are written to
+CHART_EXPORT_DIR = os.getenv("CHART_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "crypt_charts"))
+CHART_SERIES = ("prices", "market_caps", "total_volumes")
+
+async def export_historical_chart(coin_name: str, days: int):
+    """
+    Writes the historical market chart of a coin to a CSV file for the Python assistant to load.
+
+    Handing the assistant a file path instead of the nested [timestamp, value] lists keeps thousands of numbers out of the prompt,
+    so the series reach its code exactly and load straight into columns, e.g. with pandas.read_csv.
+
+    Args:
+        coin_name (str): The ID, name or symbol of the cryptocurrency coin for which to fetch historical data.
+        days (int): The number of days for which to fetch historical data.
+
+    Returns:
+        dict: The path of the CSV file, its columns and its number of rows, or the error if the chart could not be fetched.
+    """
+    response_data = await _get_market_chart(coin_name, days)
+    if is_error_response(response_data):
+        return response_data
+
+    # One row per timestamp, with a column per series
+    rows = {}
+    for series in CHART_SERIES:
+        for timestamp, value in response_data.get(series, []):
+            rows.setdefault(timestamp, {})[series] = value
+
+    columns = ["timestamp_ms", *CHART_SERIES]
+    os.makedirs(CHART_EXPORT_DIR, exist_ok=True)
+    path = os.path.join(CHART_EXPORT_DIR, f"{re.sub(r'[^a-z0-9]+', '-', coin_name.strip().lower())}_{days}d.csv")
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        for timestamp in sorted(rows):
+            writer.writerow([timestamp, *(rows[timestamp].get(series) for series in CHART_SERIES)])
+
+    return {"path": path, "columns": columns, "rows": len(rows)}
+
+def find_arb_opportunities_traderjoe(coin1, coin2):
     # TraderJoe router contract address
     ROUTER_ADDRESS = "0x60aE616a2155Ee3d9A68541Ba4544862310933d4"
     
@@ -271,7 +798,7 @@ def find_arb_opportunities_traderjoe(coin1, coin2):
     NATIVE_TOKEN_ADDRESS = "0xB31f66AA3C1e785363F0875A1B74E27b85FD66c7"
     
     # Use the Chainstack RPC link to connect to the Avalanche network
-    with networks.parse_network_choice("avalanche:mainnet:https://avalanche-mainnet.core.chainstack.com/ext/bc/C/rpc/f33804dd98cad6bc454e78ea22d84e82") as provider:
+    with networks.parse_network_choice(f"avalanche:mainnet:{AVALANCHE_RPC_URL}") as provider:
         # Set up contracts
         router_contract = Contract(ROUTER_ADDRESS)
         token0 = Contract(coin1)
@@ -287,7 +814,7 @@ def find_arb_opportunities_traderjoe(coin1, coin2):
                 
                 print(f"1 {token0.symbol()} = {qty_out} {token1.symbol()}: No Arbitrage opportunity")
                 if 1.01 <= qty_out < 2.00:
-                    print(f"{datetime.datetime.now().strftime('[%I:%M:%S %p]')} {token0.symbol()} -> {token1.symbol()}: ({qty_out:.3f})")
+                    print(f"{datetime.now().strftime('[%I:%M:%S %p]')} {token0.symbol()} -> {token1.symbol()}: ({qty_out:.3f})")
                     print("Arbitrage opportunity found!")
                     return True
             
@@ -296,11 +823,35 @@ def find_arb_opportunities_traderjoe(coin1, coin2):
                 return False
 
 
+@functools.cache
+def _get_python_assistant() -> PythonAssistant:
+    """
+    Returns the shared Python assistant, creating it the first time the tool is used.
+    """
+    return PythonAssistant(
+        llm=OpenAIChat(model="gpt-3.5-turbo", api_key=os.getenv("OPENAI_TOKEN")),
+        pip_install=True,
+        show_function_calls=True,
+        run_code=True
+    )
+
+def run_python_assistant(message: str):
+    """
+    Sends the given prompt to the Python assistant, which writes and runs Python code to answer it.
+    """
+    return _get_python_assistant().print_response(message)
+
+
 """
 CLASSES
 """
 
+# Tool inputs are immutable once validated, and short string fields are bounded so a runaway LLM argument is rejected early
+TOOL_INPUT_CONFIG = ConfigDict(frozen=True, str_max_length=256)
+
 class ArbitrageInput(BaseModel):
+    model_config = TOOL_INPUT_CONFIG
+
     coin1: str = Field(description="This is either the name, symbol or an id of a coin as represented on the CoinGecko Website. IDs of coins on CoinGecko typically have hyphens. For example: bitcoin")
     coin2: str = Field(description="This is either the name, symbol or an id of a coin as represented on the CoinGecko Website. IDs of coins on CoinGecko typically have hyphens. For example: bitcoin")
 
@@ -308,40 +859,73 @@ class ArbitrageInput(BaseModel):
 # CoinInput class is used to define the input structure for coin-related operations.
 # It contains a single field 'coin_name' which should be the ID# of a coin.
 class CoinInput(BaseModel):
+    model_config = TOOL_INPUT_CONFIG
+
     coin_name: str = Field(description="This is either the name, symbol or an id of a coin as represented on the CoinGecko Website. IDs of coins on CoinGecko typically have hyphens. For example: bitcoin")
 
+# CoinListInput class is used to define the input structure for operations on several coins at once.
+# It contains a single field 'coin_names' with the name, symbol or id of each coin.
+class CoinListInput(BaseModel):
+    model_config = TOOL_INPUT_CONFIG
+
+    coin_names: List[str] = Field(description="A list of coins, each either the name, symbol or an id of a coin. For example: ['bitcoin', 'ETH', 'solana']")
+
 # MoneyInput class is used to define the input structure for currency conversion operations.
-# It contains two fields: 'usd_coin_price' for the USD dollar value ($) of the coin and 'currency_to_convert_to' for the target currency.
+# It contains the fields 'usd_coin_price' for the USD dollar value ($) of the coin, 'currency_to_convert_to' for the target currency,
+# and 'coin_name' for converting a coin's live price without looking it up first.
 class MoneyInput(BaseModel):
-    usd_coin_price: str = Field(description="Should be USD dollar value ($) of the coin")
+    model_config = TOOL_INPUT_CONFIG
+
+    usd_coin_price: Optional[str] = Field(default=None, description="Should be USD dollar value ($) of the coin")
     currency_to_convert_to: str = Field(description="This is the currency which the USD price is being converted TO")
+    coin_name: Optional[str] = Field(default=None, description="The name, symbol or id of the coin whose price should be converted. Give this instead of usd_coin_price when the USD price is not already known")
 
 # NFTInput class is used to define the input structure for NFT-related operations.
 # It contains a single field 'nft_data' which can be the name, symbol, or an id of a NFT collection as represented on the CoinGecko Website.
 # IDs of NFT collections on CoinGecko typically have hyphens. For example: pudgy-penguins.
 class NFTInput(BaseModel):
+    model_config = TOOL_INPUT_CONFIG
+
     nft_data: str = Field(description="This is either the name, symbol or an id of a NFT collection as represented on the CoinGecko Website. ID all have hypens. For example: pudgy-penguins")
 
 # DerivativeInput class is used to define the input structure for derivative-related operations.
 # It contains a single field 'derivative_data' which can be the name or an id of a derivative from a specific exchange.
 class DerivativeInput(BaseModel):
+    model_config = TOOL_INPUT_CONFIG
+
     derivative_data: str = Field(description="This is the name or an id of a derivative from a specific exchange")
 
 class HistoricalData(BaseModel):
+    model_config = TOOL_INPUT_CONFIG
+
     coin_name: str = Field(description="The ID # of a coin")
     days: int = Field(description="Number of days for historical data")
     chart_data_type: str = Field(description="What type of data is being asked for. Can ONLY be 3 options: prices, market_caps, volume (total). If the option given sounds close please change it to one of the 3 options. Example: the user gives 'price' it should be converted to prices ")
 
+class HistoricalMultiData(BaseModel):
+    model_config = TOOL_INPUT_CONFIG
+
+    coin_name: str = Field(description="The ID # of a coin")
+    days: int = Field(description="Number of days for historical data")
+    chart_data_types: List[str] = Field(description="The types of data being asked for. Each can ONLY be one of 3 options: prices, market_caps, total_volumes. Example: the user asks for 'price and volume' it should be converted to ['prices', 'total_volumes']")
+
 class OHLCData(BaseModel):
+    model_config = TOOL_INPUT_CONFIG
+
     coin_name: str = Field(description="The ID # of a coin")
     days: int = Field(description="Number of days for historical data")
 
 class HistoricalTimeRangeData(BaseModel):
+    model_config = TOOL_INPUT_CONFIG
+
     coin_name: str = Field(description="The ID # of a coin")
     from_: str = Field(description="The date from which to start the historical data. Should be converted from natural language to UNIX timestamp")
     to_: str = Field(description="The date which historical data should end at. Should be converted from natural language to UNIX timestamp")
 
 class AIPrompt(BaseModel):
+    # Prompts for the Python assistant can be long, so only freeze them
+    model_config = ConfigDict(frozen=True)
+
     message: str = Field(description="The text prompt for the AI to process")
 
 """
@@ -349,7 +933,7 @@ TOOL CREATION (combination of classes and functions)
 """
 
 get_specific_coin_address_tool = StructuredTool.from_function(
-    func=get_specific_coin_address,
+    coroutine=get_specific_coin_address,
     name="Get_Specific_Coin_Address",
     description="Returns the contract address for a specific cryptocurrency coin.",
     args_schema=CoinInput
@@ -364,15 +948,23 @@ get_all_coins_tool = StructuredTool.from_function(
 
 # This tool returns specific cryptocurrency coin data from the Coin Gecko platform.
 specific_coin_price_tool = StructuredTool.from_function(
-    func=get_specific_coin_price,
+    coroutine=get_specific_coin_price,
     name="Specific_Tool_Data",
     description="Returns specific cryptocurrency coin data from the Coin Gecko platform. The JSON response from the Coin Gecko API containing information about the specified coin which should be used for data extraction.",
     args_schema=CoinInput   
 )
 
+# This tool returns the USD prices of several cryptocurrency coins in one call.
+specific_coin_prices_tool = StructuredTool.from_function(
+    coroutine=get_specific_coin_prices,
+    name="Specific_Coin_Prices",
+    description="Returns the USD prices of several cryptocurrency coins in one call. Use this instead of calling Specific_Tool_Data once per coin when comparing coins.",
+    args_schema=CoinListInput
+)
+
 # This tool converts the given USD coin price to the specified currency using a conversion API.
 convert_coin_price_tool = StructuredTool.from_function(
-    func=convert_coin_price,
+    coroutine=convert_coin_price,
     name="Convert_Coin_Price",
     description="This converts the given USD coin price to the specified currency using a conversion API.",
     args_schema=MoneyInput
@@ -380,7 +972,7 @@ convert_coin_price_tool = StructuredTool.from_function(
 
 # This tool returns ALL the NFT Data of a given NFT collection.
 get_nft_data_tool = StructuredTool.from_function(
-    func=get_nft_data,
+    coroutine=get_nft_data,
     name="Get_NFT_Data",
     description="Returns ALL the NFT Data of a given NFT collection",
     args_schema=NFTInput
@@ -388,7 +980,7 @@ get_nft_data_tool = StructuredTool.from_function(
 
 # This tool returns a specific derivative and its respective data from the CoinGecko platform based on the provided information.
 get_derivative_data_tool = StructuredTool.from_function(
-    func=get_derivative_data,
+    coroutine=get_derivative_data,
     name="Get_Derviative_Data",
     description="Returns a specific derivative and its respective data from the CoinGecko platform based on the provided information.",
     args_schema=DerivativeInput
@@ -396,7 +988,7 @@ get_derivative_data_tool = StructuredTool.from_function(
 
 # This tool returns the trending coins data from the CoinGecko platform.
 get_trending_coins_tool = StructuredTool.from_function(
-    func=get_trending_coins,
+    coroutine=get_trending_coins,
     name="Get_Trending_Coins",
     description="Returns the trending coins data from the CoinGecko platform.",
     args_schema=None
@@ -404,7 +996,7 @@ get_trending_coins_tool = StructuredTool.from_function(
 
 # This tool returns the trending NFTs data from the CoinGecko platform.
 get_trending_nfts_tool = StructuredTool.from_function(
-    func=get_trending_nfts,
+    coroutine=get_trending_nfts,
     name="Get_Trending_NFTs",
     description="Returns the trending NFTs data from the CoinGecko platform.",
     args_schema=None
@@ -412,50 +1004,64 @@ get_trending_nfts_tool = StructuredTool.from_function(
 
 # This tool returns the trending categories data from the CoinGecko platform.
 get_trending_categories_tool = StructuredTool.from_function(
-    func=get_trending_categories,
+    coroutine=get_trending_categories,
     name="Get_Trending_Categories",
     description="Returns the trending categories data from the CoinGecko platform.",
     args_schema=None
 )
 
 get_specific_coin_data_tool = StructuredTool.from_function(
-    func=get_specific_coin_data,
+    coroutine=get_specific_coin_data,
     name="Get_Specific_Coin_Data",
     description="Returns specific cryptocurrency coin data from the Coin Gecko platform."
 )
 
 # Python Tool
-python_assistant = PythonAssistant(
-    llm=OpenAIChat(model="gpt-3.5-turbo", api_key=os.getenv("OPENAI_TOKEN")),
-    pip_install=True,
-    show_function_calls=True,
-    run_code=True
-)
-
 python_assistant_tool = StructuredTool.from_function(
-    func=python_assistant.print_response,
-    description="A Python shell for data analysis, predictions, converting natural language dates to UNIX timestamps and machine learning. Use this to execute python commands. Input should be a valid python command.",
+    func=run_python_assistant,
+    description="A Python shell for data analysis, predictions, converting natural language dates to UNIX timestamps and machine learning. Use this to execute python commands. Input should be a valid python command. To analyse or predict a coin's price history, call Export_Historical_Chart first and give this tool the CSV path it returns rather than the data itself.",
     name="python_assistant",
     args_schema=AIPrompt
 )
 
 # Get Historical Dat By ID Tool
 get_historical_data_by_id_tool = StructuredTool.from_function(
-    func=get_historical_chart_data_by_id,
+    coroutine=get_historical_chart_data_by_id,
     name="Get_Historical_Data_By_ID",
     description="Returns historical data for a given cryptocurrency by its ID.",
     args_schema=HistoricalData
 )
 
 get_historical_data_within_timeRange_by_id_tool = StructuredTool.from_function(
-    func=get_historical_chart_data_by_id_timerange,
+    coroutine=get_historical_chart_data_by_id_timerange,
     name="Get_Historical_Data_By_ID_TimeRange",
     description="Returns historical data for a given cryptocurrency by its ID within a specified UNIX timestamped time range.",
     args_schema=HistoricalTimeRangeData
 )
 
+get_historical_multi_tool = StructuredTool.from_function(
+    coroutine=get_historical_multi,
+    name="Get_Historical_Multi_Data_By_ID",
+    description="Returns several historical data series (prices, market_caps, total_volumes) for a given cryptocurrency by its ID in one call.",
+    args_schema=HistoricalMultiData
+)
+
+get_historical_and_ohlc_data_tool = StructuredTool.from_function(
+    coroutine=get_historical_and_ohlc_data,
+    name="Get_Historical_And_OHLC_Data_By_ID",
+    description="Returns both the historical market chart and the Open, High, Low, Close data for a given cryptocurrency over a specified number of days.",
+    args_schema=OHLCData
+)
+
+export_historical_chart_tool = StructuredTool.from_function(
+    coroutine=export_historical_chart,
+    name="Export_Historical_Chart",
+    description="Saves the historical prices, market caps and total volumes of a given cryptocurrency over a specified number of days to a CSV file, and returns its path for the python_assistant to load.",
+    args_schema=OHLCData
+)
+
 ohlc_tool = StructuredTool.from_function(
-    func=get_ohlc_chat_by_id,
+    coroutine=get_ohlc_chat_by_id,
     name="OHLC_Tool",
     description="Returns the Open, High, Low, Close data for a given cryptocurrency over a specified number of days.",
     args_schema=OHLCData
@@ -468,31 +1074,33 @@ find_arb_opportunities_traderjoe_tool = StructuredTool.from_function(
     args_schema=ArbitrageInput
 )
 
-# ----------TESTING----------------
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain_core.prompts import ChatPromptTemplate
-from llm import LLM
-
-tools = [get_all_coins_tool, specific_coin_price_tool, convert_coin_price_tool, get_nft_data_tool, get_derivative_data_tool, get_trending_coins_tool, get_trending_nfts_tool, get_trending_categories_tool, get_historical_data_by_id_tool, ohlc_tool, python_assistant_tool, get_specific_coin_data_tool, find_arb_opportunities_traderjoe_tool, get_specific_coin_address_tool]
-
-prompt = ChatPromptTemplate.from_messages(
-    [
-        (
-            "system",
-            "You are a helpful crypto assistant with access to a wide range of tools to help answer questions about cryptocurrencies.",
-        ),
-        ("placeholder", "{chat_history}"),
-        ("human", "{input}"),
-        ("placeholder", "{agent_scratchpad}"),
-    ]
-)
-
-agent = create_tool_calling_agent(LLM.gpt3_5, tools, prompt)
+# Every tool the agent can use
+TOOLS = [get_all_coins_tool, specific_coin_price_tool, specific_coin_prices_tool, convert_coin_price_tool, get_nft_data_tool, get_derivative_data_tool, get_trending_coins_tool, get_trending_nfts_tool, get_trending_categories_tool, get_historical_data_by_id_tool, get_historical_multi_tool, get_historical_and_ohlc_data_tool, export_historical_chart_tool, ohlc_tool, python_assistant_tool, get_specific_coin_data_tool, find_arb_opportunities_traderjoe_tool, get_specific_coin_address_tool]
 
-agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
-
-print(agent_executor.invoke(
-    {
-        "input": "Get the contract addresses for USDT and USDC on the Avalanche network. Then find arbitrage opportunities on TraderJoe for them both."
-    })
-    )
\ No newline at end of file
+# ----------TESTING----------------
+if __name__ == "__main__":
+    from langchain.agents import AgentExecutor, create_tool_calling_agent
+    from langchain_core.prompts import ChatPromptTemplate
+    from llm import LLM
+
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            (
+                "system",
+                "You are a helpful crypto assistant with access to a wide range of tools to help answer questions about cryptocurrencies.",
+            ),
+            ("placeholder", "{chat_history}"),
+            ("human", "{input}"),
+            ("placeholder", "{agent_scratchpad}"),
+        ]
+    )
+
+    agent = create_tool_calling_agent(LLM.gpt3_5, TOOLS, prompt)
+
+    agent_executor = AgentExecutor(agent=agent, tools=TOOLS, verbose=True)
+
+    print(asyncio.run(agent_executor.ainvoke(
+        {
+            "input": "Get the contract addresses for USDT and USDC on the Avalanche network. Then find arbitrage opportunities on TraderJoe for them both."
+        }))
+        )
@@ -1,87 +1,143 @@
 # Imports 
 import os
-from datetime import datetime, timedelta
-from pprint import pprint
+import logging
+import asyncio
+import functools
+import aiohttp
+import orjson
+from datetime import date, datetime, timedelta
 from dotenv import load_dotenv
 from pyyoutube import Client
-from newscatcherapi_client import Newscatcher, ApiException
 from utilities import generate_unique_id
 
 # Environmental Variables
 load_dotenv('.env')
 
+# Newscatcher v3 search endpoint
+NEWSCATCHER_SEARCH_URL = "https://v3-api.newscatcherapi.com/api/search"
+
 COUNTRIES = "AD, AE, AF, AG, AI, AL, AM, AO, AQ, AR, AS, AT, AU, AW, AX, AZ, BA, BB, BD, BE, BF, BG, BH, BI, BJ, BL, BM, BN, BO, BQ, BR, BS, BT, BV, BW, BY, BZ, CA, CC, CD, CF, CG, CH, CI, CK, CL, CM, CN, CO, CR, CU, CV, CW, CX, CY, CZ, DE, DJ, DK, DM, DO, DZ, EC, EE, EG, EH, ER, ES, ET, FI, FJ, FK, FM, FO, FR, GA, GB, GD, GE, GF, GG, GH, GI, GL, GM, GN, GP, GQ, GR, GS, GT, GU, GW, GY, HK"
 
 LANG = "af,ar,bg,bn,ca,cs,cy,cn,da,de,el,en,es,et,fa,fi,fr,gu,he,hi,hr,hu,id,it,ja,kn,ko,lt,lv,mk,ml,mr,ne,nl,no,pa,pl,pt,ro,ru,sk,sl,so,sq,sv,sw,ta,te,th,tl,tr,tw,uk,ur,vi"
 
-def get_news_from_newscatcher() -> list:
+# Article fields kept from each Newscatcher result
+NEWSCATCHER_FIELDS = (
+    "title", "author", "authors", "journalists", "published_date", "published_date_precision",
+    "updated_date", "updated_date_precision", "link", "domain_url", "full_domain_url", "name_source",
+    "is_headline", "paid_content", "parent_url", "country", "rights", "rank", "media", "language",
+    "description", "content", "word_count", "is_opinion", "twitter_account", "all_links",
+    "all_domain_links", "score"
+)
+
+# Article fields the app renders, which are all that is kept in the newscatcher_news collection
+SUMMARY_FIELDS = ("title", "link", "published_date", "description", "media", "domain_url", "language")
+
+# Content is only kept for articles shorter than this, and only this many links are kept per article
+MAX_CONTENT_WORDS = 2000
+MAX_LINKS = 10
+
+# Time allowed for each page of Newscatcher results, including reading the body
+NEWSCATCHER_TIMEOUT = aiohttp.ClientTimeout(total=60)
+
+# Upper bound on the result pages fetched in one run, to protect the API quota
+MAX_NEWSCATCHER_PAGES = 10
+
+@functools.lru_cache(maxsize=1)
+def default_published_after(today: date) -> str:
+    """
+    Builds the default start date of the Newscatcher search, 30 days before today.
+
+    The result is cached per day, so repeated calls skip the date arithmetic and formatting.
+
+    Args:
+        today (date): The current date, which is the cache key.
+
+    Returns:
+        str: The start date in the 'YYYY/MM/DD' format Newscatcher expects.
+    """
+    return (today - timedelta(days=30)).isoformat().replace('-', '/') # changed the timeframe to 30 days from 182 days
+
+async def get_news_from_newscatcher(session: aiohttp.ClientSession, published_after: str = None) -> list:
     """
-    Retrieves news articles from the Newscatcher API.
+    Retrieves news articles from the Newscatcher API, following every page of results.
+
+    Args:
+        session (aiohttp.ClientSession): The session used to call the API.
+        published_after (str): Only articles published after this date are requested. Defaults to the last 30 days.
+
     Returns a list of news articles.
-    Raises ApiException if the API request fails.
+    If a request fails, the articles fetched before it are returned.
     """
     
-    print("DEBUG: Setting up Newscatcher API client")   
+    print("DEBUG: Setting up Newscatcher API request")   
     # Newscatcher API
-    newscatcher = Newscatcher(api_key=os.getenv('NEWS_API'))
+    headers = {"x-api-token": os.getenv('NEWS_API', '')}
+
+    # Only ask for articles newer than the ones already stored
+    params = {
+        "q": "DeFi, Cryptocurrency, NFTs",
+        "search_in": "content, summary, title",
+        "lang": LANG,
+        "sort_by": "date", # most recent articles are grabbed first
+        "countries": COUNTRIES,
+        "from_": published_after or default_published_after(date.today()),
+        "is_paid_content": "false",
+    }
+    newscatcher_articles = []
+    page = 1
     
     try:
-        response = newscatcher.search.get(q="DeFi, Cryptocurrency, NFTs",
-            search_in="content, summary, title",
-            lang=LANG,
-            sort_by="date", # most recent articles are grabbed first
-            page=1,
-            countries=COUNTRIES,
-            from_= (datetime.now() - timedelta(days=30)).strftime('%Y/%m/%d'), # changed the timeframe to 30 days from 182 days
-            is_paid_content= False,
-        )
-        
-        print("DEBUG: Received response from Newscatcher API")
-        
-        if response.status == "ok":
-            print("DEBUG: Response status is ok, processing articles")
-            newscatcher_articles = [
+        while page <= MAX_NEWSCATCHER_PAGES:
+            # aiohttp asks for a gzip'd body, and the multi-MB payload is decoded with orjson rather than the stdlib json
+            async with session.get(NEWSCATCHER_SEARCH_URL, params={**params, "page": page}, headers=headers, timeout=NEWSCATCHER_TIMEOUT) as response:
+                raw = await response.read()
+                if response.status != 200:
+                    print(f"DEBUG: Error: Newscatcher API returned {response.status}")
+                    if response.status in [422, 403]:
+                        logging.debug("%r", raw)
+                    break
+            payload = orjson.loads(raw)
+            
+            print(f"DEBUG: Received page {page} from Newscatcher API")
+            
+            if payload.get("status") != "ok" or not payload.get("articles"):
+                break
+
+            newscatcher_articles.extend(
                 {
                     "data_id": generate_unique_id(article['link']),
-                    "title": article['title'],
-                    "author": article['author'],
-                    "authors": article['authors'],
-                    "journalists": article['journalists'],
-                    "published_date": article['published_date'],
-                    "published_date_precision": article['published_date_precision'],
-                    "updated_date": article['updated_date'],
-                    "updated_date_precision": article['updated_date_precision'],
-                    "link": article['link'],
-                    "domain_url": article['domain_url'],
-                    "full_domain_url": article['full_domain_url'],
-                    "name_source": article['name_source'],
-                    "is_headline": article['is_headline'],
-                    "paid_content": article['paid_content'],
-                    "parent_url": article['parent_url'],
-                    "country": article['country'],
-                    "rights": article['rights'],
-                    "rank": article['rank'],
-                    "media": article['media'],
-                    "language": article['language'],
-                    "description": article['description'],
-                    "content": article['content'],
-                    "word_count": article['word_count'],
-                    "is_opinion": article['is_opinion'],
-                    "twitter_account": article['twitter_account'],
-                    "all_links": article['all_links'],
-                    "all_domain_links": article['all_domain_links'],
-                    "score": article['score']
-                } for article in response.articles
-            ]
-            print("DEBUG: Processed articles, returning the list")
-            return newscatcher_articles
-    except ApiException as e:
-        print(f"DEBUG: Error: {e}")
-        if e.status in [422, 403]:
-            pprint(e.body)
-    
-    print("DEBUG: Returning empty list due to API error")
-    return []
+                    **{field: article.get(field) for field in NEWSCATCHER_FIELDS}
+                } for article in payload["articles"]
+            )
+
+            if page >= (payload.get("total_pages") or page):
+                break
+            page += 1
+    except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
+        print(f"DEBUG: Error: {e!r}")
+
+    print("DEBUG: Processed articles, returning the list")
+    return newscatcher_articles
+
+
+def summarise_newscatcher_articles(newscatcher_articles: list) -> list:
+    """
+    Projects Newscatcher articles down to the fields the app renders, so the stored documents stay small.
+
+    Args:
+        newscatcher_articles (list): The articles returned by get_news_from_newscatcher.
+
+    Returns:
+        list: A list of dictionaries with the data_id, the SUMMARY_FIELDS, the content of short articles and at most MAX_LINKS links.
+    """
+    summaries = []
+    for article in newscatcher_articles:
+        summary = {"data_id": article["data_id"], **{field: article.get(field) for field in SUMMARY_FIELDS}}
+        if (article.get("word_count") or 0) < MAX_CONTENT_WORDS:
+            summary["content"] = article.get("content")
+        summary["all_links"] = (article.get("all_links") or [])[:MAX_LINKS]
+        summaries.append(summary)
+    return summaries
 
 
 def extract_youtube_videos() -> list:
@@ -130,6 +186,7 @@ def extract_youtube_videos() -> list:
     print("DEBUG: Returning empty list due to error")
     return []
 
-# Example usage
-youtube_link = extract_youtube_videos()
-print(youtube_link)
+if __name__ == "__main__":
+    # Example usage
+    youtube_link = extract_youtube_videos()
+    print(youtube_link)
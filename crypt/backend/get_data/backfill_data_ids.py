@@ -0,0 +1,60 @@
+from pymongo import DeleteOne, UpdateOne
+import mongodb as mdb
+from utilities import generate_unique_ids
+
+# Field each collection's data_id is generated from
+ID_SOURCE_FIELDS = {
+    "rekt_news": "link",
+    "crypto_news": "link",
+    "newscatcher_news": "link",
+    "youtube_news": "video_url",
+}
+
+def backfill_data_ids(collection_name: str, source_field: str):
+    """
+    Recomputes the data_id of every document in a collection with the current generate_unique_id scheme.
+
+    Documents stored under the old SHA-256 mod 10**6 ids are moved to their BLAKE2b id. When several documents share a
+    link, such as one stored under the old id and one inserted again under the new id, the oldest is kept and the rest are deleted.
+
+    Args:
+        collection_name (str): The name of the MongoDB collection to backfill.
+        source_field (str): The field holding the link the data_id is generated from.
+
+    Returns:
+        None
+    """
+    mongodb_collection = mdb.get_client()[mdb.DATABASE_NAME][collection_name]
+
+    print(f"DEBUG: Backfilling data ids in {collection_name}...")
+    documents = [
+        document for document in mongodb_collection.find({}, {source_field: 1, "data_id": 1}).sort("_id", 1)
+        if document.get(source_field)
+    ]
+    data_ids = generate_unique_ids([document[source_field] for document in documents])
+
+    kept_ids = set()
+    deletes = []
+    updates = []
+    for document, data_id in zip(documents, data_ids):
+        if data_id in kept_ids:
+            deletes.append(DeleteOne({"_id": document["_id"]}))
+            continue
+        kept_ids.add(data_id)
+        if document.get("data_id") != data_id:
+            updates.append(UpdateOne({"_id": document["_id"]}, {"$set": {"data_id": data_id}}))
+
+    # Duplicates are deleted first, so no update collides with them on the unique data_id index
+    for operations in (deletes, updates):
+        for start in range(0, len(operations), mdb.UPLOAD_BATCH_SIZE):
+            mongodb_collection.bulk_write(operations[start:start + mdb.UPLOAD_BATCH_SIZE])
+
+    print(f"Updated {len(updates)} and deleted {len(deletes)} data points in {collection_name}.")
+
+def main():
+    # Run once, before the first ingestion run with the new ids
+    for collection_name, source_field in ID_SOURCE_FIELDS.items():
+        backfill_data_ids(collection_name, source_field)
+
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,174 @@
-import feedparser
-from utilities import generate_unique_id
+import os
+import json
+import asyncio
+import aiohttp
+import fastfeedparser as feedparser
+from utilities import generate_unique_ids
 
-def get_rekt_news_articles() -> list:
+# File holding the ETag and Last-Modified validators of each feed from the last run, next to this script by default
+FEED_STATE_FILE = os.getenv('FEED_STATE_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.feed_state.json'))
+
+def load_feed_state() -> dict:
+    """
+    Loads the validators saved for each feed by previous runs.
+
+    Returns:
+        dict: A dictionary mapping each feed URL to its 'etag' and 'modified' validators.
+    """
+    try:
+        with open(FEED_STATE_FILE) as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_feed_state(feed_state: dict) -> None:
+    """
+    Saves the validators of feeds downloaded this run, so the next run only downloads feeds that have changed.
+
+    This should only be called once the feed's articles have been uploaded, otherwise a failed upload would skip them next run.
+
+    Args:
+        feed_state (dict): A dictionary mapping feed URLs to their validators, as returned with the feed's articles.
+    """
+    if not feed_state:
+        return
+    state = load_feed_state()
+    state.update(feed_state)
+    with open(FEED_STATE_FILE, 'w') as file:
+        json.dump(state, file)
+
+async def fetch_feed(session: aiohttp.ClientSession, url: str) -> tuple[bytes | None, dict]:
+    """
+    Downloads the raw XML of an RSS feed with a conditional GET.
+
+    Args:
+        session (aiohttp.ClientSession): The session used to download the feed.
+        url (str): The URL of the RSS feed.
+
+    Returns:
+        tuple[bytes | None, dict]: The body of the feed, ready to be handed to the parser, and a dictionary mapping the URL to
+        its new validators. The body is None and the dictionary empty if the feed hasn't changed since the last run.
+    """
+    validators = load_feed_state().get(url, {})
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('modified'):
+        headers['If-Modified-Since'] = validators['modified']
+
+    async with session.get(url, headers=headers) as response:
+        if response.status == 304:
+            return None, {}
+        response.raise_for_status()
+        body = await response.read()
+
+    feed_state = {
+        url: {
+            'etag': response.headers.get('ETag'),
+            'modified': response.headers.get('Last-Modified')
+        }
+    }
+    return body, feed_state
+
+def parse_rekt_news_feed(xml: bytes) -> list:
+    """
+    Parses the raw XML of the Rekt News RSS feed into articles.
+
+    Args:
+        xml (bytes): The body of the Rekt News RSS feed.
+
+    Returns:
+        list: A list of dictionaries, each containing details about a Rekt News article.
+    """
+    feed = feedparser.parse(xml)
+    # Hash every link in one pass before building the articles
+    data_ids = generate_unique_ids([article.link for article in feed.entries])
+    # Extract relevant information from each article in the feed
+    return [
+        {
+            'data_id': data_id,
+            'title': article.title,  # Title of the article
+            'publication_date': article.get('published'),  # Publication date of the article
+            'summary': article.description,  # Summary of the article
+            'link': article.link,  # URL link to the full article
+            'image': next((enclosure['url'] for enclosure in article.get('enclosures', ())), None)  # URL of the image if available
+        } for data_id, article in zip(data_ids, feed.entries)
+    ]
+
+
+def parse_crypto_news_feed(xml: bytes) -> list:
+    """
+    Parses the raw XML of the Crypto News RSS feed into articles.
+
+    Args:
+        xml (bytes): The body of the Crypto News RSS feed.
+
+    Returns:
+        list: A list of dictionaries, each containing details about a Crypto News article.
+    """
+    feed = feedparser.parse(xml)
+    # Hash every link in one pass before building the articles
+    data_ids = generate_unique_ids([article.link for article in feed.entries])
+    # Extract relevant information from each article in the feed
+    return [
+        {
+            'data_id': data_id,  # Unique ID of the article
+            'title': article.title,  # Title of the article
+            'link': article.link,  # URL link to the full article
+            'author_detail': dict(article.get('author_detail', {'name': article.get('author')})),  # Author details of the article
+            'published': article.get('published'),  # Publication date of the article
+            'tags': [tag['term'] for tag in article.get('tags', [])],  # Tags associated with the article
+            'summary': article.description,  # Summary of the article
+            'media_thumbnail': article.media_content[0].get('url') if 'media_content' in article else None  # URL of the media thumbnail if available
+        } for data_id, article in zip(data_ids, feed.entries)
+    ]
+
+
+async def get_rekt_news_articles(session: aiohttp.ClientSession) -> tuple[list, dict]:
     """
     Fetches and parses the RSS feed from the Rekt News website to extract news articles.
     
+    Args:
+        session (aiohttp.ClientSession): The session used to download the feed.
+    
     Returns:
-        list: A list of dictionaries, each containing details about a Rekt News article such as title, publication date, summary, link, and image URL if available.
+        tuple[list, dict]: A list of dictionaries, each containing details about a Rekt News article such as title, publication date, summary, link, and image URL if available,
+        and the feed's validators, to be passed to save_feed_state once the articles are uploaded.
     """
     # URL of the Rekt News RSS feed
     rekt_news = 'https://rekt.news/rss/feed.xml'
-    # Parse the RSS feed using feedparser
-    feed = feedparser.parse(url_file_stream_or_string=rekt_news)
+    # Download the RSS feed, then parse it off the event loop so the other downloads keep going
+    xml, feed_state = await fetch_feed(session, rekt_news)
+    if xml is None:
+        print("DEBUG: Rekt news feed has not changed since the last run")
+        return [], {}
     
     print("DEBUG: Fetching articles from rekt news...")
-    # Extract relevant information from each article in the feed
-    rekt_articles = [
-        {
-            'data_id': generate_unique_id(article.link),
-            'title': article.title,  # Title of the article
-            'publication_date': article.published,  # Publication date of the article
-            'summary': article.summary,  # Summary of the article
-            'link': article.link,  # URL link to the full article
-            'image': [link['href'] for link in article.links if link.get('rel') == 'enclosure'][0] 
-            if any(link.get('rel') == 'enclosure' for link in article.links) else None  # URL of the image if available
-        } for article in feed.entries
-    ]
+    rekt_articles = await asyncio.to_thread(parse_rekt_news_feed, xml)
     
     print("DEBUG: Extracted relevant information from rekt news")
-    return rekt_articles
+    return rekt_articles, feed_state
 
 
-def get_crypto_news_articles() -> list:
+async def get_crypto_news_articles(session: aiohttp.ClientSession) -> tuple[list, dict]:
     """
     Fetches and parses the RSS feed from the Crypto News website to extract news articles.
     
+    Args:
+        session (aiohttp.ClientSession): The session used to download the feed.
+    
     Returns:
-        list: A list of dictionaries, each containing details about a Crypto News article such as title, link, author, publication date, tags, id, summary, and media thumbnail URL if available.
+        tuple[list, dict]: A list of dictionaries, each containing details about a Crypto News article such as title, link, author, publication date, tags, id, summary, and media thumbnail URL if available,
+        and the feed's validators, to be passed to save_feed_state once the articles are uploaded.
     """
-    # Parse the RSS feed from Crypto News using feedparser
-    feed = feedparser.parse(url_file_stream_or_string='https://crypto.news/feed/')
+    # Download the RSS feed from Crypto News, then parse it off the event loop so the other downloads keep going
+    xml, feed_state = await fetch_feed(session, 'https://crypto.news/feed/')
+    if xml is None:
+        print("DEBUG: Crypto news feed has not changed since the last run")
+        return [], {}
     
     print("DEBUG: Fetching articles from crypto.news")
-    # Extract relevant information from each article in the feed
-    article_data = [
-        {
-            'data_id': generate_unique_id(article.link),  # Unique ID of the article
-            'title': article.title,  # Title of the article
-            'link': article.link,  # URL link to the full article
-            'author_detail': article.author_detail,  # Author details of the article
-            'published': article.published,  # Publication date of the article
-            'tags': [tag['term'] for tag in article.tags],  # Tags associated with the article
-            'summary': article.summary,  # Summary of the article
-            'media_thumbnail': article.media_thumbnail[0]['url'] if 'media_thumbnail' in article else None  # URL of the media thumbnail if available
-        } for article in feed.entries
-    ]
+    article_data = await asyncio.to_thread(parse_crypto_news_feed, xml)
     
     print("DEBUG: Extracted relevant information from crypto news")
-    return article_data
+    return article_data, feed_state
@@ -1,49 +1,91 @@
+import asyncio
+import aiohttp
 import rss
 import mongodb as mdb
 import apis
 import logging
 
-# Error Handling
-try:
-    rekt_news_articles = rss.get_rekt_news_articles()
-    crypto_news_articles = rss.get_crypto_news_articles()
-    newscatcher_news_articles = apis.get_news_from_newscatcher()
-    youtube_videos = apis.extract_youtube_videos()
-except Exception as e:
-    logging.error(f"Error fetching news articles: {e}")
-    raise
-
 # Logging
 logging.basicConfig(level=logging.INFO)
 
 # Code Reusability
 def upload_articles_to_db(collection_name, article_data):
     if article_data:
-        mdb.upload_to_mongodb(collection_name=collection_name, data=article_data)
-    else:
-        print(f"No new {collection_name} data can be found")
-
-# Upload rekt news articles
-upload_articles_to_db(
-    collection_name="rekt_news",
-    article_data=rekt_news_articles
-)
-
-# Upload crypto news articles
-upload_articles_to_db(
-    collection_name="crypto_news", 
-    article_data=crypto_news_articles
-)
-
-# Upload newscatcher news articles
-upload_articles_to_db(
-    collection_name="newscatcher_news",
-    article_data=newscatcher_news_articles
-)
-
-# Upload youtube videos
-upload_articles_to_db(
-    collection_name="youtube_news",
-    article_data=youtube_videos
-)
+        return mdb.upload_to_mongodb(collection_name=collection_name, article_data=article_data)
+    print(f"No new {collection_name} data can be found")
+    return True
+
+async def fetch_articles(newscatcher_published_after: str = None) -> list:
+    """
+    Fetches the rekt news, crypto news, newscatcher and youtube data concurrently.
+
+    Args:
+        newscatcher_published_after (str): Only newscatcher articles published after this date are fetched.
+
+    Returns:
+        list: The result of each fetch in that order, where the rss results also carry their feed's validators.
+        A fetch that failed is logged and returned without articles or validators.
+    """
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(
+            rss.get_rekt_news_articles(session),
+            rss.get_crypto_news_articles(session),
+            apis.get_news_from_newscatcher(session, newscatcher_published_after),
+            # The YouTube client is blocking, so it runs in a worker thread
+            asyncio.to_thread(apis.extract_youtube_videos),
+            return_exceptions=True
+        )
+
+    # Error Handling
+    empty_results = (([], {}), ([], {}), [], [])
+    articles = []
+    for result, empty_result in zip(results, empty_results):
+        if isinstance(result, Exception):
+            logging.error(f"Error fetching news articles: {result}")
+            result = empty_result
+        articles.append(result)
+    return articles
+
+def main():
+    # Newscatcher only needs to return articles newer than the newest one already stored
+    newscatcher_published_after = mdb.get_latest_value("newscatcher_news", "published_date")
+
+    (rekt_news_articles, rekt_feed_state), (crypto_news_articles, crypto_feed_state), newscatcher_news_articles, youtube_videos = asyncio.run(
+        fetch_articles(newscatcher_published_after)
+    )
+
+    # Upload rekt news articles, and only remember the feed version once its articles are stored
+    if upload_articles_to_db(
+        collection_name="rekt_news",
+        article_data=rekt_news_articles
+    ):
+        rss.save_feed_state(rekt_feed_state)
+
+    # Upload crypto news articles, and only remember the feed version once its articles are stored
+    if upload_articles_to_db(
+        collection_name="crypto_news", 
+        article_data=crypto_news_articles
+    ):
+        rss.save_feed_state(crypto_feed_state)
+
+    # Upload newscatcher news articles, keeping only the fields the app renders
+    upload_articles_to_db(
+        collection_name="newscatcher_news",
+        article_data=apis.summarise_newscatcher_articles(newscatcher_news_articles)
+    )
+
+    # Archive the full newscatcher articles for a week
+    if newscatcher_news_articles:
+        mdb.upload_raw_to_mongodb(
+            collection_name="newscatcher_raw",
+            article_data=newscatcher_news_articles
+        )
+
+    # Upload youtube videos
+    upload_articles_to_db(
+        collection_name="youtube_news",
+        article_data=youtube_videos
+    )
 
+if __name__ == "__main__":
+    main()
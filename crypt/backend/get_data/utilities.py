@@ -2,7 +2,9 @@ import hashlib
 
 def generate_unique_id(link: str) -> int:
     """
-    Generates a unique integer ID from a given link using SHA-256 hashing.
+    Generates a unique integer ID from a given link using BLAKE2b hashing.
+
+    The 8 byte digest is read as a signed integer so it fits in a BSON int64, giving 64 bits of collision resistance.
 
     Args:
         link (str): The link to generate a unique ID from.
@@ -10,6 +12,25 @@ def generate_unique_id(link: str) -> int:
     Returns:
         int: A unique integer ID generated from the link.
     """
-    return int(hashlib.sha256(link.encode()).hexdigest(), 16) % (10**6)
+    return int.from_bytes(hashlib.blake2b(link.encode(), digest_size=8).digest(), 'big', signed=True)
+
+
+# Initialised BLAKE2b state that generate_unique_ids copies for each link instead of setting up a new hasher
+_BLAKE2B_8 = hashlib.blake2b(digest_size=8)
+
+def generate_unique_ids(links: list) -> list:
+    """
+    Generates the unique integer IDs of many links at once, matching generate_unique_id for each link.
 
+    Args:
+        links (list): The links to generate unique IDs from.
 
+    Returns:
+        list: The unique integer ID of each link, in the same order.
+    """
+    ids = []
+    for link in links:
+        hasher = _BLAKE2B_8.copy()
+        hasher.update(link.encode())
+        ids.append(int.from_bytes(hasher.digest(), 'big', signed=True))
+    return ids